@@ -12,7 +12,6 @@ from typing import Annotated
 from a2a.server.agent_execution import request_context_builder
 from a2a.types import AgentCapabilities
 from google.adk import Agent
-from google.adk.models.lite_llm import LiteLlm
 from google.adk.a2a.converters.request_converter import (
     convert_a2a_request_to_agent_run_request,
 )
@@ -23,6 +22,8 @@ from google.adk.a2a.executor.a2a_agent_executor import (
 from google.adk.code_executors import UnsafeLocalCodeExecutor
 import logging
 
+from llm_model import build_model
+
 # Enable debug logging for code execution
 logging.basicConfig(level=logging.INFO)
 logging.getLogger('google_adk').setLevel(logging.INFO)
@@ -31,31 +32,8 @@ logging.getLogger('google_adk').setLevel(logging.INFO)
 def create_agent() -> Agent:
     """Create an agent with code execution support."""
 
-    # Get custom model name if specified
-    custom_model = os.getenv("MODEL_NAME")
-    model_name = custom_model or "gpt-4o-mini"
-
-    print(f"Using model: {model_name}")
-
-    # Check for OpenAI API key
-    if not os.getenv("OPENAI_API_KEY"):
-        print("⚠️  Warning: OPENAI_API_KEY not set")
-        print("Please set it with: export OPENAI_API_KEY='your-api-key'")
-        print()
-
-    # Check for custom API URL
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_URL")
-    if base_url:
-        print(f"Using custom API URL: {base_url}")
-        os.environ["OPENAI_API_BASE"] = base_url
-
-    # Create LiteLLM model with streaming enabled
-    litellm_model_name = f"openai/{model_name}" if not model_name.startswith("openai/") else model_name
-    model = LiteLlm(
-        model=litellm_model_name,
-        api_base=base_url if base_url else None,
-        stream=True
-    )
+    # Shared streaming LiteLLM model, configured from the environment
+    model = build_model()
 
     # Create code execution tool
     code_executor = UnsafeLocalCodeExecutor()
@@ -140,41 +118,67 @@ task_store = InMemoryTaskStore()
 from google.adk.a2a.converters.event_converter import convert_event_to_a2a_events
 from google.adk.a2a.converters.part_converter import convert_genai_part_to_a2a_part
 
+event_logger = logging.getLogger("adk.events")
+# Per-event logging is off by default; set ADK_LOG_EVENTS=1 to enable it.
+if os.getenv("ADK_LOG_EVENTS"):
+    event_logger.setLevel(logging.DEBUG)
+
+
+def _preview(text, n=80):
+    """Shorten text to n characters and escape newlines for a one-line log."""
+    if len(text) > n:
+        text = text[:n]
+    return text.replace('\n', '\\n')
+
+
+def _log_event(event):
+    """Log the author, invocation and parts of an ADK event."""
+    event_logger.debug("📤 ADK Event: author=%s invocation_id=%s", event.author, event.invocation_id)
+    parts = list(event.content.parts or ()) if event.content else []
+    if not parts:
+        event_logger.debug("   Content: None or empty")
+        return
+    for i, part in enumerate(parts):
+        if part.text:
+            event_logger.debug("   Part[%d]: TextPart: %s...", i, _preview(part.text))
+        elif part.executable_code:
+            code = part.executable_code
+            event_logger.debug("   Part[%d]: ✅ ExecutableCode (lang=%s) Code: %s...",
+                               i, code.language, _preview(code.code or "", 100))
+        elif part.code_execution_result:
+            result = part.code_execution_result
+            output = _preview(result.output, 100) if result.output else 'None'
+            event_logger.debug("   Part[%d]: ✅ CodeExecutionResult (outcome=%s) Output: %s...",
+                               i, result.outcome, output)
+        elif part.function_call:
+            event_logger.debug("   Part[%d]: FunctionCall (name=%s)", i, part.function_call.name)
+        elif part.function_response:
+            event_logger.debug("   Part[%d]: FunctionResponse (name=%s)", i, part.function_response.name)
+        else:
+            event_logger.debug("   Part[%d]: Unknown part type: %s", i, type(part))
+
+
+def _counting(events):
+    """Yield converted events unchanged and log how many there were."""
+    n = 0
+    for a2a_event in events:
+        n += 1
+        yield a2a_event
+    event_logger.debug("   -> Converted to %d A2A events", n)
+
+
 def logging_event_converter(event, invocation_context, task_id=None, context_id=None, part_converter=None):
     """Wrap the default event converter to log events."""
-    print(f"\n📤 ADK Event:")
-    print(f"   Author: {event.author}")
-    print(f"   Invocation ID: {event.invocation_id}")
-    if event.content and event.content.parts:
-        for i, part in enumerate(event.content.parts):
-            if part.text:
-                text_preview = part.text[:80].replace('\n', '\\n') if len(part.text) > 80 else part.text.replace('\n', '\\n')
-                print(f"   Part[{i}]: TextPart: {text_preview}...")
-            elif part.executable_code:
-                print(f"   Part[{i}]: ✅ ExecutableCode (lang={part.executable_code.language})")
-                code_preview = part.executable_code.code[:100].replace('\n', '\\n')
-                print(f"            Code: {code_preview}...")
-            elif part.code_execution_result:
-                print(f"   Part[{i}]: ✅ CodeExecutionResult (outcome={part.code_execution_result.outcome})")
-                output_preview = (part.code_execution_result.output[:100].replace('\n', '\\n') 
-                                  if part.code_execution_result.output else 'None')
-                print(f"            Output: {output_preview}...")
-            elif part.function_call:
-                print(f"   Part[{i}]: FunctionCall (name={part.function_call.name})")
-            elif part.function_response:
-                print(f"   Part[{i}]: FunctionResponse (name={part.function_response.name})")
-            else:
-                print(f"   Part[{i}]: Unknown part type: {type(part)}")
-    else:
-        print(f"   Content: None or empty")
-    
     # Call original converter with correct part_converter
     if part_converter is None:
         part_converter = convert_genai_part_to_a2a_part
-    
-    result = list(convert_event_to_a2a_events(event, invocation_context, task_id, context_id, part_converter))
-    print(f"   -> Converted to {len(result)} A2A events")
-    return result
+
+    events = convert_event_to_a2a_events(event, invocation_context, task_id, context_id, part_converter)
+    if not event_logger.isEnabledFor(logging.DEBUG):
+        return events
+
+    _log_event(event)
+    return _counting(events)
 
 executor_config = A2aAgentExecutorConfig(
     request_converter=logging_request_converter,
@@ -7,13 +7,12 @@ which can be called by trpc-agent-go's a2aagent client.
 
 """
 
-import os
+import operator
 from datetime import datetime
 from typing import Annotated
 from a2a.server.agent_execution import request_context_builder
 from a2a.types import AgentCapabilities
 from google.adk import Agent
-from google.adk.models.lite_llm import LiteLlm
 from google.adk.tools import FunctionTool
 from google.adk.a2a.converters.request_converter import (
     convert_a2a_request_to_agent_run_request,
@@ -23,6 +22,17 @@ from google.adk.a2a.executor.a2a_agent_executor import (
     A2aAgentExecutorConfig,
 )
 
+from llm_model import build_model
+
+
+# Supported calculator operations
+_OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+}
+
 
 def calculator(
     operation: Annotated[str, "The operation to perform: add, subtract, multiply, divide"],
@@ -31,20 +41,13 @@ def calculator(
 ) -> str:
     """Perform basic mathematical calculations."""
     try:
-        if operation == "add":
-            result = a + b
-        elif operation == "subtract":
-            result = a - b
-        elif operation == "multiply":
-            result = a * b
-        elif operation == "divide":
-            if b == 0:
-                return "Error: Division by zero"
-            result = a / b
-        else:
+        op = _OPERATIONS.get(operation)
+        if op is None:
             return f"Error: Unknown operation '{operation}'"
+        if operation == "divide" and b == 0:
+            return "Error: Division by zero"
 
-        return f"{a} {operation} {b} = {result}"
+        return f"{a} {operation} {b} = {op(a, b)}"
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -70,30 +73,8 @@ def current_time(
 def create_agent() -> Agent:
     """Create an agent with streaming support and tools."""
 
-    # Get custom model name if specified
-    custom_model = os.getenv("MODEL_NAME")
-    model_name = custom_model or "gpt-4o-mini"
-
-    print(f"Using model: {model_name}")
-
-    # Check for OpenAI API key
-    if not os.getenv("OPENAI_API_KEY"):
-        print("⚠️  Warning: OPENAI_API_KEY not set")
-        print("Please set it with: export OPENAI_API_KEY='your-api-key'")
-        print()
-
-    # Check for custom API URL
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_URL")
-    if base_url:
-        print(f"Using custom API URL: {base_url}")
-        os.environ["OPENAI_API_BASE"] = base_url
-
-    # Create LiteLLM model with streaming enabled
-    litellm_model_name = f"openai/{model_name}" if not model_name.startswith("openai/") else model_name
-    model = LiteLlm(
-        model=litellm_model_name,
-        stream=True  # Enable streaming
-    )
+    # Shared streaming LiteLLM model, configured from the environment
+    model = build_model()
 
     # Create tools
     calculator_tool = FunctionTool(calculator)
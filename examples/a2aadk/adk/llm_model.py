@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Shared LiteLLM model setup for the ADK A2A example servers.
+"""
+
+import functools
+import os
+from typing import Optional
+
+from google.adk.models.lite_llm import LiteLlm
+
+
+def _model_settings():
+    """Read model name and base URL from the environment."""
+    model_name = os.getenv("MODEL_NAME") or "gpt-4o-mini"
+    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_URL")
+    return model_name, base_url
+
+
+@functools.lru_cache(maxsize=None)
+def _create_model(model_name: str, base_url: Optional[str]) -> LiteLlm:
+    """Create one streaming LiteLLM model per (model_name, base_url)."""
+    print(f"Using model: {model_name}")
+
+    # Check for OpenAI API key
+    if not os.getenv("OPENAI_API_KEY"):
+        print("⚠️  Warning: OPENAI_API_KEY not set")
+        print("Please set it with: export OPENAI_API_KEY='your-api-key'")
+        print()
+
+    # Check for custom API URL
+    if base_url:
+        print(f"Using custom API URL: {base_url}")
+        os.environ["OPENAI_API_BASE"] = base_url
+
+    # Create LiteLLM model with streaming enabled
+    litellm_model_name = f"openai/{model_name}" if not model_name.startswith("openai/") else model_name
+    return LiteLlm(
+        model=litellm_model_name,
+        api_base=base_url if base_url else None,
+        stream=True  # Enable streaming
+    )
+
+
+def build_model() -> LiteLlm:
+    """Return the process-wide LiteLLM model configured from the environment."""
+    return _create_model(*_model_settings())
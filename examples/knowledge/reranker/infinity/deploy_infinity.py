@@ -6,14 +6,22 @@ This script starts a reranker server compatible with Infinity/Cohere API format.
 
 Requirements:
     pip install transformers torch fastapi uvicorn
+    pip install flash-attn  # optional, GPU only: attention skips padding
 
 Usage:
     python deploy_infinity.py
     python deploy_infinity.py --model BAAI/bge-reranker-v2-m3 --port 7997
     python deploy_infinity.py --device cpu --port 7997
+    python deploy_infinity.py --compile
+    python deploy_infinity.py --attn-implementation sdpa
 """
 
 import argparse
+import asyncio
+import copy
+import heapq
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 import torch
@@ -28,6 +36,9 @@ class RerankRequest(BaseModel):
     documents: list[str]
     model: str | None = None
     top_n: int | None = None
+    # False returns every document in input order when top_n keeps them all,
+    # skipping the sort for callers that look scores up by index
+    return_sorted: bool = True
 
 
 class RerankResult(BaseModel):
@@ -39,25 +50,221 @@ class RerankResponse(BaseModel):
     results: list[RerankResult]
 
 
+# Concurrent requests are coalesced into one forward pass of up to
+# MAX_BATCH_PAIRS (query, document) pairs, waiting at most MAX_WAIT_MS for
+# more requests to arrive after the first one.
+MAX_BATCH_PAIRS = 64
+MAX_WAIT_MS = 5
+# Pairs are padded together only while the longest is at most this many times
+# the length of the shortest, so short documents do not pay for long ones.
+BUCKET_RATIO = 1.5
+# Maximum tokens per (query, document) pair, special tokens included.
+MAX_LENGTH = 512
+
 model = None
 tokenizer = None
+batch_queue = None
+# All model calls run on this one thread: batches are scored one at a time
+# anyway, and torch.compile's CUDA graphs are recorded per thread, so the
+# warmup only pays off if requests run on the thread that did it.
+model_executor = None
+
+
+def model_dtype(device: str) -> torch.dtype:
+    """Pick bf16 on GPUs that support it, fp16 on older GPUs and fp32 on CPU."""
+    if not device.startswith("cuda"):
+        return torch.float32
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+def attn_implementation(device: str) -> str:
+    """Pick FlashAttention-2 on GPUs where flash-attn is installed, else SDPA.
+
+    FlashAttention-2 unpads each batch so attention only runs over real
+    tokens; SDPA is PyTorch's fused attention kernel.
+    """
+    if device.startswith("cuda") and importlib.util.find_spec("flash_attn"):
+        return "flash_attention_2"
+    return "sdpa"
+
+
+def length_buckets(lengths: list[int]) -> list[list[int]]:
+    """Group indices of similar token length so each batch pads only a little.
+
+    Indices are sorted by length and a new bucket starts once a sequence is
+    more than BUCKET_RATIO times longer than the shortest one in the bucket.
+    """
+    buckets = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if buckets and lengths[i] <= lengths[buckets[-1][0]] * BUCKET_RATIO:
+            buckets[-1].append(i)
+        else:
+            buckets.append([i])
+    return buckets
+
+
+def encode_pairs(pairs: list[list[str]]) -> dict[str, list[list[int]]]:
+    """Tokenize (query, document) pairs without padding.
+
+    A rerank request pairs one query with many documents, so each distinct
+    query is tokenized once and joined to its documents' tokens by the fast
+    tokenizer's post-processor instead of being re-tokenized for every pair.
+    """
+    post_processor = (
+        tokenizer.backend_tokenizer.post_processor if tokenizer.is_fast else None
+    )
+    if post_processor is None:
+        # Slow tokenizers, and fast ones without a post-processor, cannot
+        # join separately tokenized texts; tokenize every pair as a whole
+        return dict(tokenizer(pairs, truncation=True, max_length=MAX_LENGTH))
+
+    budget = MAX_LENGTH - post_processor.num_special_tokens_to_add(True)
+    queries = list(dict.fromkeys(query for query, _ in pairs))
+    query_encodings = dict(
+        zip(queries, tokenizer(queries, add_special_tokens=False).encodings)
+    )
+    doc_encodings = tokenizer(
+        [doc for _, doc in pairs], add_special_tokens=False
+    ).encodings
+
+    encoded = {key: [] for key in tokenizer.model_input_names}
+    for (query, _), doc in zip(pairs, doc_encodings):
+        query = query_encodings[query]
+        # Same split as truncation="longest_first": trim the longer side first,
+        # and if both are too long give the longer one the odd leftover token
+        half = budget // 2 if len(query) <= len(doc) else budget - budget // 2
+        keep = min(len(query), max(budget - len(doc), half))
+        if keep < len(query):
+            query = copy.deepcopy(query)
+            query.truncate(keep)
+        doc.truncate(budget - keep)
+        pair = post_processor.process(query, doc)
+        encoded["input_ids"].append(pair.ids)
+        encoded["attention_mask"].append(pair.attention_mask)
+        if "token_type_ids" in encoded:
+            encoded["token_type_ids"].append(pair.type_ids)
+    return encoded
+
+
+def score_pairs(pairs: list[list[str]], device: str) -> list[float]:
+    """Score (query, document) pairs in length buckets and return 0-1 scores."""
+    # Tokenize without padding first to learn each pair's true length
+    encoded = encode_pairs(pairs)
+    scores = [0.0] * len(pairs)
+    pinned = device.startswith("cuda")
+    pending = []
+
+    with torch.no_grad():
+        for bucket in length_buckets([len(ids) for ids in encoded["input_ids"]]):
+            inputs = tokenizer.pad(
+                {key: [values[i] for i in bucket] for key, values in encoded.items()},
+                return_tensors="pt",
+            )
+            if pinned:
+                # Copies from pinned memory are asynchronous, so padding the
+                # next bucket overlaps with this bucket's forward pass
+                inputs = {
+                    key: value.pin_memory().to(device, non_blocking=True)
+                    for key, value in inputs.items()
+                }
+            else:
+                inputs = inputs.to(device)
+
+            # Upcast before the sigmoid so half-precision logits keep their accuracy
+            logits = model(**inputs, return_dict=True).logits.view(-1).float()
+            # Normalize to 0-1 range using sigmoid
+            pending.append((bucket, torch.sigmoid(logits)))
+
+        # Read scores back only after every bucket has been queued, since
+        # tolist() waits for the device to finish
+        for bucket, probs in pending:
+            for i, score in zip(bucket, probs.tolist()):
+                scores[i] = score
+
+    return scores
+
+
+async def batch_worker(device: str):
+    """Drain queued rerank requests and score them in shared batches."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await batch_queue.get()]
+        total = len(batch[0][0])
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        while total < MAX_BATCH_PAIRS:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(batch_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            total += len(item[0])
+
+        pairs = [pair for request_pairs, _ in batch for pair in request_pairs]
+        try:
+            # Run the model off the event loop so new requests keep queueing.
+            scores = await loop.run_in_executor(
+                model_executor, score_pairs, pairs, device
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        offset = 0
+        for request_pairs, future in batch:
+            end = offset + len(request_pairs)
+            if not future.done():
+                future.set_result(scores[offset:end])
+            offset = end
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global model, tokenizer
+    global model, tokenizer, batch_queue, model_executor
     model_name = app.state.model_name
     device = app.state.device
 
-    print(f"Loading model: {model_name}")
+    dtype = model_dtype(device)
+    attn = app.state.attn_implementation
+    if attn == "auto":
+        attn = attn_implementation(device)
+    print(f"Loading model: {model_name} ({dtype}, {attn} attention)")
     tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    # Load weights directly in the serving precision instead of casting later
+    try:
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_name, torch_dtype=dtype, attn_implementation=attn
+        )
+    except (ImportError, ValueError) as e:
+        # Not every architecture supports every attention implementation
+        print(f"{attn} attention unavailable, using the model default: {e}")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_name, torch_dtype=dtype
+        )
     model.to(device)
     model.eval()
     print(f"Model loaded on {device}")
 
+    model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    if app.state.compile:
+        # dynamic=True avoids recompiling for every batch/sequence length
+        model = torch.compile(model, mode="reduce-overhead", dynamic=True, fullgraph=False)
+        # Warm up so the first real request does not pay the compile cost
+        model_executor.submit(score_pairs, [["warmup", "warmup"]], device).result()
+        print("Model compiled with torch.compile")
+
+    batch_queue = asyncio.Queue()
+    worker = asyncio.create_task(batch_worker(device))
+
     yield
 
+    worker.cancel()
+    model_executor.shutdown()
     del model, tokenizer
 
 
@@ -66,30 +273,25 @@ app = FastAPI(title="Reranker Server", lifespan=lifespan)
 
 @app.post("/rerank", response_model=RerankResponse)
 async def rerank(request: RerankRequest):
-    pairs = [[request.query, doc] for doc in request.documents]
+    if not request.documents:
+        return RerankResponse(results=[])
 
-    with torch.no_grad():
-        inputs = tokenizer(
-            pairs,
-            padding=True,
-            truncation=True,
-            max_length=512,
-            return_tensors="pt",
-        ).to(app.state.device)
-
-        logits = model(**inputs, return_dict=True).logits.view(-1).float()
-        # Normalize to 0-1 range using sigmoid
-        scores = torch.sigmoid(logits)
-
-    results = [
-        RerankResult(index=i, relevance_score=float(score))
-        for i, score in enumerate(scores)
-    ]
-
-    results.sort(key=lambda x: x.relevance_score, reverse=True)
-
-    if request.top_n and request.top_n > 0:
-        results = results[: request.top_n]
+    pairs = [[request.query, doc] for doc in request.documents]
+    future = asyncio.get_running_loop().create_future()
+    await batch_queue.put((pairs, future))
+    scores = await future
+
+    # Select the top_n indices before building any result objects
+    top_n = len(scores)
+    if request.top_n and 0 < request.top_n < top_n:
+        top_n = request.top_n
+        indices = heapq.nlargest(top_n, range(len(scores)), key=scores.__getitem__)
+    elif request.return_sorted:
+        indices = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+    else:
+        indices = range(len(scores))
+
+    results = [RerankResult(index=i, relevance_score=scores[i]) for i in indices]
 
     return RerankResponse(results=results)
 
@@ -114,11 +316,24 @@ def main():
         type=str,
         default="cuda" if torch.cuda.is_available() else "cpu",
     )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Compile the model with torch.compile (slower startup, faster inference)",
+    )
+    parser.add_argument(
+        "--attn-implementation",
+        choices=["auto", "flash_attention_2", "sdpa", "eager"],
+        default="auto",
+        help="Attention kernel (default: flash_attention_2 if installed on GPU, else sdpa)",
+    )
 
     args = parser.parse_args()
 
     app.state.model_name = args.model
     app.state.device = args.device
+    app.state.compile = args.compile
+    app.state.attn_implementation = args.attn_implementation
 
     print(f"Starting server on http://{args.host}:{args.port}")
     print(f"Rerank endpoint: http://localhost:{args.port}/rerank")
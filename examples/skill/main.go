@@ -161,7 +161,7 @@ func ensureWhisperPython3() {
 
 // canImportWhisperWithPython3 checks if whisper can be imported using python3.
 func canImportWhisperWithPython3() bool {
-	c := exec.Command("python3", "-c", "import whisper")
+	c := exec.Command("python3", "-c", "import faster_whisper")
 	c.Stdout = io.Discard
 	c.Stderr = io.Discard
 	return c.Run() == nil
@@ -169,7 +169,7 @@ func canImportWhisperWithPython3() bool {
 
 // canImportWhisperWithPython checks if whisper can be imported using python.
 func canImportWhisperWithPython() bool {
-	c := exec.Command("python", "-c", "import whisper")
+	c := exec.Command("python", "-c", "import faster_whisper")
 	c.Stdout = io.Discard
 	c.Stderr = io.Discard
 	return c.Run() == nil
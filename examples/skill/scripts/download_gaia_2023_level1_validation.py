@@ -20,6 +20,16 @@ Usage:
   python3 examples/skill/scripts/download_gaia_2023_level1_validation.py \
     --with-files
 
+Attachments are fetched with huggingface_hub when it is installed, using
+hf_transfer for faster downloads if that is installed too; otherwise plain
+HTTP is used. Either way files are written straight into --data-dir (the
+HF_HOME cache is not used):
+  python3 -m pip install huggingface_hub hf_transfer
+
+API responses are parsed and the dataset JSON is written with orjson when
+it is installed:
+  python3 -m pip install orjson
+
 Then run the Go example from examples/skill:
   go run . -data-dir ./data -dataset ./data/gaia_2023_level1_validation.json
 """
@@ -27,8 +37,10 @@ Then run the Go example from examples/skill:
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import json
 import os
+import shutil
 import sys
 import time
 import urllib.parse
@@ -38,6 +50,24 @@ from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from urllib.error import HTTPError
 
+try:
+    import hf_transfer  # noqa: F401
+except ImportError:
+    hf_transfer = None
+else:
+    # Let huggingface_hub use the multi-threaded Rust downloader.
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+try:
+    from huggingface_hub import hf_hub_download
+except ImportError:
+    hf_hub_download = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 HF_DATASET = "gaia-benchmark/GAIA"
 HF_CONFIG = "2023_level1"
@@ -45,6 +75,21 @@ HF_SPLIT = "validation"
 
 DEFAULT_DATASET_JSON = "gaia_2023_level1_validation.json"
 
+# The datasets server returns at most 100 rows per request.
+ROWS_PAGE_SIZE = 100
+ROWS_FETCH_WORKERS = 8
+
+# Task field -> dataset row keys holding it, in priority order. The order of
+# the fields is the order of the keys in the written dataset JSON.
+FIELD_MAP: Dict[str, Tuple[str, ...]] = {
+    "task_id": ("task_id", "id", "taskID"),
+    "Question": ("Question", "question"),
+    "Level": ("Level", "level"),
+    "Final answer": ("Final answer", "final_answer", "final answer", "answer"),
+    "file_name": ("file_name", "filename"),
+    "file_path": ("file_path", "file", "attachment"),
+}
+
 
 class DownloadError(RuntimeError):
     pass
@@ -79,6 +124,9 @@ def _http_get_json(url: str, token: Optional[str] = None) -> Any:
         if body:
             msg += f": {body.strip()}"
         raise DownloadError(msg) from e
+    if orjson is not None:
+        # orjson parses the raw UTF-8 bytes without decoding to str first.
+        return orjson.loads(data)
     return json.loads(data.decode("utf-8"))
 
 
@@ -89,10 +137,16 @@ def _http_download(url: str, dst: Path, token: str, force: bool) -> None:
     headers = {"User-Agent": "trpc-agent-go/examples-skill"}
     headers["Authorization"] = "Bearer " + token
     req = urllib.request.Request(url, headers=headers)
+    # Stream into a temporary file and rename it into place once complete,
+    # so an interrupted download is never mistaken for a finished one.
+    tmp = dst.with_name(dst.name + ".part")
     try:
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            data = resp.read()
+        with urllib.request.urlopen(req, timeout=300) as resp, open(
+            tmp, "wb"
+        ) as f:
+            shutil.copyfileobj(resp, f, length=1 << 20)
     except HTTPError as e:
+        tmp.unlink(missing_ok=True)
         body = ""
         try:
             body = e.read().decode("utf-8", errors="replace")
@@ -102,7 +156,38 @@ def _http_download(url: str, dst: Path, token: str, force: bool) -> None:
         if body:
             msg += f": {body.strip()}"
         raise DownloadError(msg) from e
-    dst.write_bytes(data)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, dst)
+
+
+def _hub_download(
+    sha: str, rfilename: str, data_dir: Path, token: str, force: bool
+) -> bool:
+    """Download one dataset file with huggingface_hub when it is installed.
+
+    Returns False when huggingface_hub is unavailable so the caller can fall
+    back to plain HTTP.
+    """
+    if hf_hub_download is None:
+        return False
+    dst = data_dir / rfilename
+    if dst.exists() and not force and dst.stat().st_size > 0:
+        return True
+    try:
+        hf_hub_download(
+            repo_id=HF_DATASET,
+            repo_type="dataset",
+            filename=rfilename,
+            revision=sha,
+            token=token,
+            local_dir=str(data_dir),
+            force_download=force,
+        )
+    except Exception as e:
+        raise DownloadError(f"Failed to download {rfilename}: {e}") from e
+    return True
 
 
 def _dataset_api() -> Tuple[str, List[str]]:
@@ -119,36 +204,62 @@ def _dataset_api() -> Tuple[str, List[str]]:
     return sha, files
 
 
-def _fetch_rows(token: str) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    offset = 0
-    length = 100
+def _http_get_json_retry(url: str, token: str, retries: int = 5) -> Any:
+    # Back off exponentially when the datasets server rate-limits us.
+    delay = 1.0
+    for attempt in range(retries):
+        try:
+            return _http_get_json(url, token=token)
+        except DownloadError as e:
+            cause = e.__cause__
+            rate_limited = isinstance(cause, HTTPError) and cause.code == 429
+            if not rate_limited or attempt == retries - 1:
+                raise
+        time.sleep(delay)
+        delay *= 2
+
+
+def _rows_url(offset: int, length: int) -> str:
     quoted_dataset = urllib.parse.quote(HF_DATASET, safe="")
     quoted_config = urllib.parse.quote(HF_CONFIG, safe="")
     quoted_split = urllib.parse.quote(HF_SPLIT, safe="")
-    while True:
-        url = (
-            "https://datasets-server.huggingface.co/rows"
-            f"?dataset={quoted_dataset}"
-            f"&config={quoted_config}"
-            f"&split={quoted_split}"
-            f"&offset={offset}"
-            f"&length={length}"
-        )
-        obj = _http_get_json(url, token=token)
-        chunk = obj.get("rows") or []
-        if not isinstance(chunk, list) or not chunk:
-            break
-        for it in chunk:
-            if isinstance(it, dict):
-                rows.append(it)
-        offset += len(chunk)
-        total = obj.get("num_rows_total")
-        if isinstance(total, int) and offset >= total:
-            break
-        if len(chunk) < length:
-            break
-        time.sleep(0.1)
+    return (
+        "https://datasets-server.huggingface.co/rows"
+        f"?dataset={quoted_dataset}"
+        f"&config={quoted_config}"
+        f"&split={quoted_split}"
+        f"&offset={offset}"
+        f"&length={length}"
+    )
+
+
+def _fetch_page(offset: int, token: str) -> Tuple[List[Dict[str, Any]], Any]:
+    obj = _http_get_json_retry(_rows_url(offset, ROWS_PAGE_SIZE), token)
+    chunk = obj.get("rows") or []
+    if not isinstance(chunk, list):
+        chunk = []
+    return [it for it in chunk if isinstance(it, dict)], obj.get(
+        "num_rows_total"
+    )
+
+
+def _fetch_rows(token: str) -> List[Dict[str, Any]]:
+    rows, total = _fetch_page(0, token)
+    if isinstance(total, int):
+        # The first page tells us the row count, so request every remaining
+        # page at once instead of walking them one round-trip at a time.
+        offsets = range(ROWS_PAGE_SIZE, total, ROWS_PAGE_SIZE)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=ROWS_FETCH_WORKERS
+        ) as ex:
+            for page, _ in ex.map(lambda o: _fetch_page(o, token), offsets):
+                rows.extend(page)
+    else:
+        # Without a total, page sequentially until a short page.
+        page = rows
+        while len(page) == ROWS_PAGE_SIZE:
+            page, _ = _fetch_page(len(rows), token)
+            rows.extend(page)
     if not rows:
         raise DownloadError(
             "No rows returned. Ensure your token has access and you "
@@ -157,15 +268,6 @@ def _fetch_rows(token: str) -> List[Dict[str, Any]]:
     return rows
 
 
-def _first_value(row: Dict[str, Any], keys: Sequence[str]) -> Any:
-    for k in keys:
-        if k in row:
-            v = row.get(k)
-            if v is not None:
-                return v
-    return ""
-
-
 def _as_str(v: Any) -> str:
     if v is None:
         return ""
@@ -203,37 +305,19 @@ def _build_tasks(rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List
         if not isinstance(row, dict):
             continue
 
-        task_id = _as_str(_first_value(row, ("task_id", "id", "taskID")))
-        question = _as_str(_first_value(row, ("Question", "question")))
-        level = _as_str(_first_value(row, ("Level", "level")))
-        final_answer = _as_str(
-            _first_value(
-                row,
-                (
-                    "Final answer",
-                    "final_answer",
-                    "final answer",
-                    "answer",
-                ),
-            )
-        )
-        file_path_val = _first_value(row, ("file_path", "file", "attachment"))
-        paths = _as_paths(file_path_val)
+        values = {
+            field: next((row[k] for k in keys if row.get(k) is not None), "")
+            for field, keys in FIELD_MAP.items()
+        }
+        paths = _as_paths(values["file_path"])
         file_path = paths[0] if paths else ""
-        file_name = _as_str(_first_value(row, ("file_name", "filename")))
-        if not file_name and file_path:
-            file_name = Path(file_path).name
-
-        tasks.append(
-            {
-                "task_id": task_id,
-                "Question": question,
-                "Level": level,
-                "Final answer": final_answer,
-                "file_name": file_name,
-                "file_path": file_path,
-            }
-        )
+
+        task = {field: _as_str(v) for field, v in values.items()}
+        task["file_path"] = file_path
+        if not task["file_name"] and file_path:
+            task["file_name"] = Path(file_path).name
+
+        tasks.append(task)
         if file_path:
             file_paths.append(file_path)
 
@@ -255,6 +339,35 @@ def _resolve_url(sha: str, rfilename: str) -> str:
     )
 
 
+def _download_file(
+    sha: str, rfilename: str, data_dir: Path, token: str, force: bool
+) -> None:
+    if _hub_download(sha, rfilename, data_dir, token, force):
+        return
+    dst = data_dir / rfilename
+    url = _resolve_url(sha, rfilename)
+    _http_download(url, dst, token=token, force=force)
+
+
+def _download_files(
+    sha: str,
+    file_paths: List[str],
+    data_dir: Path,
+    token: str,
+    force: bool,
+    jobs: int,
+) -> None:
+    # Downloads are network-bound, so overlap them to hide per-file RTT.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        futures = {
+            ex.submit(_download_file, sha, fp, data_dir, token, force): fp
+            for fp in file_paths
+        }
+        for i, fut in enumerate(concurrent.futures.as_completed(futures), 1):
+            fut.result()
+            print(f"[{i}/{len(file_paths)}] {futures[fut]}")
+
+
 def _parse_args(argv: Sequence[str]) -> argparse.Namespace:
     base = Path(__file__).resolve().parents[1]
     default_data_dir = base / "data"
@@ -285,6 +398,12 @@ def _parse_args(argv: Sequence[str]) -> argparse.Namespace:
         dest="skip_files",
         help="Also download attachment files referenced by file_path.",
     )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Number of attachment files downloaded concurrently (default: 8).",
+    )
     p.add_argument(
         "--force",
         action="store_true",
@@ -310,19 +429,24 @@ def main(argv: Sequence[str]) -> int:
 
         data_dir.mkdir(parents=True, exist_ok=True)
         dataset_json.parent.mkdir(parents=True, exist_ok=True)
-        dataset_json.write_text(
-            json.dumps(tasks, indent=2, ensure_ascii=False) + "\n",
-            encoding="utf-8",
-        )
+        if orjson is not None:
+            dataset_json.write_bytes(
+                orjson.dumps(
+                    tasks, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+                )
+            )
+        else:
+            dataset_json.write_text(
+                json.dumps(tasks, indent=2, ensure_ascii=False) + "\n",
+                encoding="utf-8",
+            )
         print(f"Wrote dataset JSON: {dataset_json}")
 
         if not args.skip_files and file_paths:
             print(f"Downloading {len(file_paths)} attachment files...")
-            for i, fp in enumerate(file_paths, 1):
-                dst = data_dir / fp
-                url = _resolve_url(sha, fp)
-                _http_download(url, dst, token=token, force=args.force)
-                print(f"[{i}/{len(file_paths)}] {fp}")
+            _download_files(
+                sha, file_paths, data_dir, token, args.force, args.jobs
+            )
 
         print("\nNext:")
         print("  cd examples/skill")
@@ -1,86 +1,384 @@
 #!/usr/bin/env python3
 """
 Whisper Audio Transcription Script
-Transcribe audio files to text using OpenAI Whisper
+Transcribe audio files to text using faster-whisper (CTranslate2 backend)
+
+Runs either as a one-shot CLI, as a batch over a manifest of files (--inputs),
+or as a long-lived worker (--daemon) that keeps the model loaded and serves
+newline-delimited JSON jobs over a Unix socket.
 """
 
 import argparse
+import asyncio
+import gc
 import json
+import socket
 import sys
+import threading
 import os
 
 try:
-    import whisper
+    import resource
+except ImportError:  # Unix only; peak memory is simply not reported
+    resource = None
+
+try:
+    import ctranslate2
+    from faster_whisper import BatchedInferencePipeline, WhisperModel, download_model
 except ImportError:
-    print("Error: openai-whisper not installed. Run: pip install openai-whisper", file=sys.stderr)
+    print("Error: faster-whisper not installed. Run: pip install faster-whisper", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:  # optional, only speeds up JSON output
+    orjson = None
+
+
+def _dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Short precision names accepted by --precision
+_PRECISION_ALIASES = {"fp32": "float32", "fp16": "float16", "bf16": "bfloat16"}
+
+
+def _resolve_device(compute_type):
+    """Pick the device and a matching compute type for this host"""
+    device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    compute_type = _PRECISION_ALIASES.get(compute_type, compute_type)
+    if not compute_type or compute_type == "auto":
+        # INT8 weight-only quantization; keep activations in FP16 on GPU
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+    return device, compute_type
+
+
+def _prefetch_weights(model_size):
+    """Start reading already-downloaded model weights into the page cache
+
+    Runs in a background thread so the disk reads overlap with device and
+    tokenizer setup instead of being demand-paged by the loader.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    def prefetch():
+        try:
+            model_dir = model_size if os.path.isdir(model_size) else \
+                download_model(model_size, local_files_only=True)
+        except Exception:
+            return  # not cached yet; WhisperModel downloads it
+        for name in os.listdir(model_dir):
+            path = os.path.join(model_dir, name)
+            if not os.path.isfile(path):
+                continue
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+
+    threading.Thread(target=prefetch, daemon=True).start()
+
+
+# Single-slot model cache: repeated calls with the same settings reuse the
+# loaded model, while a different size replaces it instead of piling up.
+_model_lock = threading.Lock()
+_model_cache = {}
+
+
+def release_model():
+    """Drop the cached model and return its host/device memory"""
+    with _model_lock:
+        _model_cache.clear()
+    gc.collect()
+
+
+def _load_pipeline(model_size, compute_type="auto", num_workers=1):
+    """Return a batched pipeline (decodes ~30s chunks together) over the cached model"""
+    key = (model_size, compute_type, num_workers)
+    with _model_lock:
+        pipeline = _model_cache.get(key)
+        if pipeline is not None:
+            return pipeline
+        if _model_cache:
+            # CTranslate2 frees device memory when the model is collected
+            _model_cache.clear()
+            gc.collect()
+
+        _prefetch_weights(model_size)
+        device, resolved = _resolve_device(compute_type)
+        print(f"Loading Whisper model: {model_size} ({device}, {resolved})...", file=sys.stderr)
+        # num_workers lets that many threads transcribe with the model concurrently
+        model = WhisperModel(model_size, device=device, compute_type=resolved,
+                             num_workers=num_workers)
+        pipeline = BatchedInferencePipeline(model=model)
+        _model_cache[key] = pipeline
+        return pipeline
+
+
+def _run(audio_path, opts):
+    """Transcribe one file with a cached model and write the output file
+
+    opts mirrors the CLI flags: output, model, compute_type, language,
+    timestamps, format, batch_size and jobs. Returns a small status dict.
+    """
 
-def transcribe_audio(audio_path, output_path, model_size="base", language=None, 
-                     timestamps=False, output_format="text"):
-    """Transcribe audio file using Whisper"""
-    
     # Validate input file
     if not os.path.exists(audio_path):
-        print(f"Error: Audio file not found: {audio_path}", file=sys.stderr)
-        sys.exit(1)
-    
-    # Load Whisper model
-    print(f"Loading Whisper model: {model_size}...", file=sys.stderr)
-    model = whisper.load_model(model_size)
-    
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    output_path = opts["output"]
+    timestamps = opts.get("timestamps", False)
+    pipeline = _load_pipeline(opts.get("model", "base"), opts.get("compute_type", "auto"),
+                              opts.get("jobs", 1))
+
     # Transcribe
     print(f"Transcribing: {audio_path}...", file=sys.stderr)
-    
-    transcribe_options = {}
-    if language and language != "auto":
-        transcribe_options["language"] = language
-    
-    result = model.transcribe(audio_path, **transcribe_options)
-    
+
+    # The pipeline splits the audio into VAD-bounded chunks of up to 30s and
+    # decodes batch_size of them per step; segment timestamps are already
+    # offset to the start of the file. Segments are produced lazily, so
+    # decoding happens while we iterate them. Timestamp tokens are only
+    # predicted when the caller asked for them.
+    segments, info = pipeline.transcribe(audio_path, language=opts.get("language"),
+                                         batch_size=opts.get("batch_size", 1),
+                                         chunk_length=30, vad_filter=True, beam_size=1,
+                                         without_timestamps=not timestamps,
+                                         word_timestamps=False)
+    result = {"language": info.language}
+    text_length = 0
+
     # Write output
-    if output_format == "json":
-        # JSON format with full metadata
-        output_data = {
-            "text": result["text"].strip(),
-            "language": result.get("language", "unknown"),
-            "segments": []
-        }
-        
-        if timestamps and "segments" in result:
-            for seg in result["segments"]:
-                output_data["segments"].append({
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": seg["text"].strip()
-                })
-        
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+    if opts.get("format", "text") == "json":
+        # JSON format with full metadata. With timestamps, segments are
+        # written as they are decoded, one compact object per line; the full
+        # text goes last since it is only known once every segment has been
+        # seen.
+        texts = []
+        with open(output_path, "wb") as f:
+            f.write(b'{\n  "language": ' + _dumps(result.get("language", "unknown")))
+            if timestamps:
+                f.write(b',\n  "segments": [')
+                first = True
+                for seg in segments:
+                    texts.append(seg.text)
+                    f.write(b"\n    " if first else b",\n    ")
+                    f.write(_dumps({
+                        "start": seg.start,
+                        "end": seg.end,
+                        "text": seg.text.strip()
+                    }))
+                    first = False
+                f.write(b"]" if first else b"\n  ]")
+            else:
+                texts.extend(seg.text for seg in segments)
+            text = "".join(texts).strip()
+            text_length = len(text)
+            f.write(b',\n  "text": ' + _dumps(text) + b"\n}\n")
     else:
-        # Plain text format
-        text = result["text"].strip()
-        
-        if timestamps and "segments" in result:
-            lines = []
-            for seg in result["segments"]:
-                lines.append(f"[{seg['start']:.2f}s - {seg['end']:.2f}s] {seg['text'].strip()}")
-            text = "\n".join(lines)
-        
+        # Plain text format, streamed segment by segment
         with open(output_path, "w", encoding="utf-8") as f:
-            f.write(text)
-    
-    print(f"✓ Transcription saved to: {output_path}", file=sys.stderr)
-    print(f"  Language: {result.get('language', 'unknown')}", file=sys.stderr)
-    print(f"  Text length: {len(result['text'])} characters", file=sys.stderr)
+            if timestamps:
+                for i, seg in enumerate(segments):
+                    text = seg.text.strip()
+                    line = f"[{seg.start:.2f}s - {seg.end:.2f}s] {text}"
+                    f.write(line if i == 0 else "\n" + line)
+                    text_length += len(text)
+            else:
+                # Trailing whitespace is held back until more text follows,
+                # so the file matches the stripped text of the JSON output
+                pending = ""
+                for seg in segments:
+                    text = pending + seg.text
+                    if not text_length:
+                        text = text.lstrip()
+                    body = text.rstrip()
+                    pending = text[len(body):]
+                    f.write(body)
+                    text_length += len(body)
+
+    return {
+        "output": output_path,
+        "language": result.get("language", "unknown"),
+        "text_length": text_length,
+    }
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _report(status):
+    print(f"✓ Transcription saved to: {status['output']}", file=sys.stderr)
+    print(f"  Language: {status['language']}", file=sys.stderr)
+    print(f"  Text length: {status['text_length']} characters", file=sys.stderr)
+    # Worker replies carry the worker's own peak memory; it may be None
+    peak = status["peak_memory_mb"] if "peak_memory_mb" in status else _peak_rss_mb()
+    if peak is not None:
+        print(f"  Peak memory: {peak:.0f} MB", file=sys.stderr)
+
+
+def transcribe_audio(audio_path, output_path, model_size="base", language=None,
+                     timestamps=False, output_format="text", compute_type="auto",
+                     batch_size=1):
+    """Transcribe audio file using Whisper"""
+    try:
+        status = _run(audio_path, {
+            "output": output_path,
+            "model": model_size,
+            "compute_type": compute_type,
+            "language": language,
+            "timestamps": timestamps,
+            "format": output_format,
+            "batch_size": batch_size,
+        })
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    _report(status)
+
+
+def _read_manifest(manifest_path, output_format):
+    """Parse "<audio>[<TAB><output>]" lines; the output defaults to the audio path
+    with a .txt/.json extension"""
+    ext = ".json" if output_format == "json" else ".txt"
+    jobs = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            audio, _, output = line.partition("\t")
+            audio = audio.strip()
+            jobs.append((audio, output.strip() or os.path.splitext(audio)[0] + ext))
+    return jobs
+
+
+async def _run_batch(jobs, opts, concurrency):
+    """Transcribe files concurrently, at most `concurrency` at a time"""
+    sem = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def run_one(audio_path, output_path):
+        async with sem:
+            try:
+                status = await loop.run_in_executor(
+                    None, _run, audio_path, dict(opts, output=output_path))
+                return {"status": "ok", "audio": audio_path, **status}
+            except Exception as e:
+                return {"status": "error", "audio": audio_path,
+                        "error": f"{type(e).__name__}: {e}"}
+
+    return await asyncio.gather(*(run_one(a, o) for a, o in jobs))
+
+
+def transcribe_batch(manifest_path, model_size="base", language=None, timestamps=False,
+                     output_format="text", compute_type="auto", batch_size=8, jobs=1):
+    """Transcribe every file listed in a manifest with one shared model"""
+    if not os.path.exists(manifest_path):
+        print(f"Error: Manifest not found: {manifest_path}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = _read_manifest(manifest_path, output_format)
+    opts = {
+        "model": model_size,
+        "compute_type": compute_type,
+        "language": language,
+        "timestamps": timestamps,
+        "format": output_format,
+        "batch_size": batch_size,
+        "jobs": jobs,
+    }
+    # Load once up front so concurrent tasks do not race on the first load
+    _load_pipeline(model_size, compute_type, jobs)
+    statuses = asyncio.run(_run_batch(entries, opts, jobs))
+
+    failed = 0
+    for status in statuses:
+        if status["status"] == "ok":
+            _report(status)
+        else:
+            failed += 1
+            print(f"Error: {status['audio']}: {status['error']}", file=sys.stderr)
+    print(f"Transcribed {len(statuses) - failed}/{len(statuses)} files", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def _handle_job(line, defaults):
+    """Run one newline-delimited JSON job and build the status reply"""
+    try:
+        job = json.loads(line)
+        opts = dict(defaults)
+        opts.update({k: v for k, v in job.items() if k != "audio" and v is not None})
+        if opts.get("language") == "auto":
+            opts["language"] = None
+        status = _run(job["audio"], opts)
+        return {"status": "ok", **status, "peak_memory_mb": _peak_rss_mb()}
+    except Exception as e:  # keep the worker alive on bad jobs
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def serve(socket_path, model_size="base", compute_type="auto", batch_size=8):
+    """Keep the model loaded and serve transcription jobs on a Unix socket"""
+    defaults = {"model": model_size, "compute_type": compute_type, "batch_size": batch_size}
+    _load_pipeline(model_size, compute_type)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    print(f"Whisper worker listening on: {socket_path}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile("rwb") as stream:
+                for line in stream:
+                    if not line.strip():
+                        continue
+                    reply = _handle_job(line, defaults)
+                    stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+                    stream.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        release_model()
+
+
+def request_worker(socket_path, job):
+    """Send one job to a running worker and return its status reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rwb") as stream:
+            stream.write(json.dumps(job).encode("utf-8") + b"\n")
+            stream.flush()
+            reply = stream.readline()
+    if not reply:
+        raise ConnectionError("worker closed the connection without replying")
+    return json.loads(reply)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Transcribe audio using Whisper")
-    parser.add_argument("audio_file", help="Input audio file path")
-    parser.add_argument("output_file", help="Output text/JSON file path")
-    parser.add_argument("--model", default="base", 
-                       choices=["tiny", "base", "small", "medium", "large"],
+    parser.add_argument("audio_file", nargs="?", help="Input audio file path")
+    parser.add_argument("output_file", nargs="?", help="Output text/JSON file path")
+    parser.add_argument("--model", default="base",
+                       choices=["tiny", "base", "small", "medium", "large",
+                                "large-v2", "large-v3"],
                        help="Whisper model size (default: base)")
     parser.add_argument("--language", default="auto",
                        help="Language code (e.g., en, zh, es) or 'auto' (default: auto)")
@@ -88,16 +386,82 @@ def main():
                        help="Include timestamps in output")
     parser.add_argument("--format", default="text", choices=["text", "json"],
                        help="Output format (default: text)")
-    
+    parser.add_argument("--compute-type", "--precision", default="auto",
+                       choices=["auto", "int8", "int8_float16", "int8_bfloat16",
+                                "int8_float32", "float16", "bfloat16", "float32",
+                                "fp16", "bf16", "fp32"],
+                       help="Weight/activation precision (default: auto, "
+                            "int8_float16 on GPU and int8 on CPU)")
+    parser.add_argument("--inputs",
+                       help="Manifest of files to transcribe in one run, one "
+                            "'<audio>[<TAB><output>]' per line")
+    parser.add_argument("--batch-size", type=int, default=None,
+                       help="Audio chunks decoded per batch (default: 8 with "
+                            "--inputs or --daemon, else 1)")
+    parser.add_argument("--jobs", type=int, default=1,
+                       help="Files transcribed concurrently with --inputs (default: 1)")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Run as a persistent worker on --socket")
+    parser.add_argument("--socket",
+                       help="Unix socket of the persistent worker; without "
+                            "--daemon, send the job to it if it is running")
+
     args = parser.parse_args()
-    
+
+    if args.daemon:
+        if not args.socket:
+            parser.error("--daemon requires --socket")
+        serve(args.socket, model_size=args.model, compute_type=args.compute_type,
+              batch_size=args.batch_size or 8)
+        return
+
+    if args.inputs:
+        transcribe_batch(
+            args.inputs,
+            model_size=args.model,
+            language=args.language if args.language != "auto" else None,
+            timestamps=args.timestamps,
+            output_format=args.format,
+            compute_type=args.compute_type,
+            batch_size=args.batch_size or 8,
+            jobs=max(1, args.jobs)
+        )
+        return
+
+    if not args.audio_file or not args.output_file:
+        parser.error("audio_file and output_file are required")
+
+    if args.socket:
+        job = {
+            "audio": os.path.abspath(args.audio_file),
+            "output": os.path.abspath(args.output_file),
+            "model": args.model,
+            "compute_type": args.compute_type,
+            "language": args.language,
+            "timestamps": args.timestamps,
+            "format": args.format,
+        }
+        try:
+            status = request_worker(args.socket, job)
+        except (FileNotFoundError, ConnectionError) as e:
+            print(f"Worker at {args.socket} unavailable ({e}), running in-process",
+                  file=sys.stderr)
+        else:
+            if status.get("status") != "ok":
+                print(f"Error: {status.get('error')}", file=sys.stderr)
+                sys.exit(1)
+            _report(status)
+            return
+
     transcribe_audio(
         args.audio_file,
         args.output_file,
         model_size=args.model,
         language=args.language if args.language != "auto" else None,
         timestamps=args.timestamps,
-        output_format=args.format
+        output_format=args.format,
+        compute_type=args.compute_type,
+        batch_size=args.batch_size or 1
     )
 
 
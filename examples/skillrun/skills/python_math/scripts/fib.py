@@ -1,17 +1,35 @@
 import sys
 
 def fib(n: int):
+    vals = []
     a, b = 0, 1
     for _ in range(n):
-        print(a)
+        vals.append(a)
         a, b = b, a + b
+    # One write instead of one print per number.
+    if vals:
+        sys.stdout.write("\n".join(map(str, vals)) + "\n")
+
+def fib_value(n: int) -> int:
+    # Fast doubling: F(2k) = F(k)(2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2.
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == "1":
+            a, b = b, a + b
+    return a
 
 if __name__ == "__main__":
+    args = sys.argv[1:]
+    value_only = "--value-only" in args
+    args = [a for a in args if a != "--value-only"]
     n = 10
-    if len(sys.argv) > 1:
+    if args:
         try:
-            n = int(sys.argv[1])
+            n = int(args[0])
         except Exception:
             n = 10
-    fib(n)
-
+    if value_only:
+        print(fib_value(max(n, 0)))
+    else:
+        fib(n)